@@ -1,20 +1,20 @@
 import streamlit as st
-import pandas as pd
-import os
 import re
+import csv
 import datetime
+import hashlib
+from array import array
+from functools import lru_cache
 from io import BytesIO
-import tempfile
-from PIL import Image as PILImage, ImageDraw, ImageFont
-import base64
 
 # ReportLab imports for PDF generation
-from reportlab.lib.pagesizes import landscape
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Spacer, Paragraph, PageBreak, Image
-from reportlab.lib.units import cm, inch
+from reportlab.platypus import Table, TableStyle, Paragraph, Flowable
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.lib.utils import ImageReader
+from reportlab.lib.units import cm
 from reportlab.lib.styles import ParagraphStyle
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+from reportlab.lib.enums import TA_LEFT, TA_CENTER
 
 # Define sticker dimensions
 STICKER_WIDTH = 10 * cm
@@ -25,15 +25,185 @@ STICKER_PAGESIZE = (STICKER_WIDTH, STICKER_HEIGHT)
 CONTENT_BOX_WIDTH = 9.8 * cm
 CONTENT_BOX_HEIGHT = 5 * cm
 
+# Mask pattern used by "Fast QR" - any mask scans, the search only tidies the pattern
+FAST_QR_MASK = 0
+
+# Distinct (text, style) Paragraphs kept per sticker run
+PARAGRAPH_CACHE_SIZE = 4096
+
+# Instructions shown before a file is uploaded
+FORMAT_REQUIREMENTS_MD = """
+Your file should contain the following columns (column names are flexible):
+
+**Required Columns:**
+- **Assembly Name** (ASSLY, Assembly, etc.)
+- **Part Number** (PART NO, Part Number, etc.)
+- **Description** (DESCRIPTION, Part Description, etc.)
+
+**Optional Columns:**
+- **Quantity** (QTY/VEH, Quantity, etc.)
+- **Type** (TYPE, Part Type, etc.)
+- **Line Location** (LINE LOCATION, Line Location, etc.)
+- **Part Status** (PART STATUS, Status, etc.)
+- **Bin Type** (BIN TYPE, Container Type, etc.)
+"""
+
+FEATURES_MD = """
+- 🏷️ **Professional sticker labels** with bordered layout
+- 📱 **QR codes** containing all product information
+- 🖼️ **Logo support** for branding
+- 📐 **Customizable layout** with adjustable column widths
+- 📋 **Flexible column mapping** - works with various column names
+- 📄 **PDF output** ready for printing
+- 🔄 **Batch processing** of multiple items
+"""
+
+# Paragraph styles - shared by every sticker
+ASSLY_STYLE = ParagraphStyle(
+    name='ASSLY',
+    fontName='Helvetica',
+    fontSize=9,
+    alignment=TA_LEFT,
+    leading=11,
+    spaceAfter=0,
+    wordWrap='CJK',
+    autoLeading="max"
+)
+PART_STYLE = ParagraphStyle(
+    name='PART NO',
+    fontName='Helvetica-Bold',
+    fontSize=11,
+    alignment=TA_LEFT,
+    leading=13,
+    spaceAfter=0,
+    wordWrap='CJK',
+    autoLeading="max"
+)
+# Style for part status box
+PART_STATUS_STYLE = ParagraphStyle(
+    name='PART STATUS',
+    fontName='Helvetica-Bold',
+    fontSize=9,
+    alignment=TA_CENTER,
+    leading=11,
+    spaceAfter=0,
+    wordWrap='CJK',
+    autoLeading="max"
+)
+DESC_STYLE = ParagraphStyle(name='PART DESC', fontName='Helvetica', fontSize=7, alignment=TA_LEFT, leading=8, spaceAfter=0, wordWrap='CJK', autoLeading="max")
+PARTPER_STYLE = ParagraphStyle(name='Quantity', fontName='Helvetica', fontSize=9, alignment=TA_LEFT, leading=12)
+# Style for bin type
+BIN_TYPE_STYLE = ParagraphStyle(name='BinType', fontName='Helvetica', fontSize=8, alignment=TA_CENTER, leading=10)
+TYPE_STYLE = ParagraphStyle(name='Quantity', fontName='Helvetica', fontSize=7, alignment=TA_LEFT, leading=12)
+DATE_STYLE = ParagraphStyle(name='DATE', fontName='Helvetica', fontSize=7, alignment=TA_LEFT, leading=12)
+LOCATION_STYLE = ParagraphStyle(name='Location', fontName='Helvetica', fontSize=8, alignment=TA_CENTER, leading=10)
+QR_PLACEHOLDER_STYLE = ParagraphStyle(name='QRPlaceholder', fontName='Helvetica-Bold', fontSize=12, alignment=TA_CENTER)
+
+# Table styles - shared by every sticker
+ASSLY_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTNAME', (1, 0), (1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('ALIGN', (0, 0), (0, 0), 'CENTER'),
+    ('ALIGN', (1, 0), (1, 0), 'CENTER'),
+    ('ALIGN', (2, 0), (2, 0), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('LEFTPADDING', (0, 0), (-1, -1), 2),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+])
+
+# Style for 3-column PART NO table
+PARTNO_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),  # Header bold
+    ('FONTNAME', (1, 0), (1, 0), 'Helvetica-Bold'),  # Part number bold
+    ('FONTNAME', (2, 0), (2, 0), 'Helvetica-Bold'),  # Part status bold
+    ('FONTSIZE', (0, 0), (0, 0), 8),                # Header font size
+    ('FONTSIZE', (1, 0), (1, 0), 11),               # Part number font size
+    ('FONTSIZE', (2, 0), (2, 0), 9),                # Part status font size
+    ('ALIGN', (0, 0), (0, 0), 'CENTER'),            # Header centered
+    ('ALIGN', (1, 0), (1, 0), 'LEFT'),              # Part number left
+    ('ALIGN', (2, 0), (2, 0), 'CENTER'),            # Part status centered
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('LEFTPADDING', (0, 0), (-1, -1), 3),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+])
+
+DESC_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (0, -1), 8),
+    ('FONTSIZE', (1, 0), (-1, 0), 7),
+    ('ALIGN', (0, 0), (0, -1), 'CENTER'),
+    ('ALIGN', (1, 0), (1, 0), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('LEFTPADDING', (0, 0), (-1, -1), 3),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+])
+
+# Style for combined QTY/TYPE/DATE table with proper QR spanning
+QTY_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),  # Headers bold
+    ('FONTSIZE', (0, 0), (0, -1), 8),                # Header font size
+    ('FONTSIZE', (1, 0), (2, 0), 9),                # QTY and bin type font size
+    ('FONTSIZE', (1, 1), (2, 2), 10),               # TYPE and DATE font size
+    ('ALIGN', (0, 0), (0, -1), 'CENTER'),           # Headers centered
+    ('ALIGN', (1, 0), (1, -1), 'LEFT'),             # Values left
+    ('ALIGN', (2, 0), (2, 0), 'CENTER'),            # Bin type centered
+    ('ALIGN', (3, 0), (3, 0), 'CENTER'),            # QR code centered
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('LEFTPADDING', (0, 0), (-1, -1), 3),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ('SPAN', (3, 0), (3, 2)),  # QR code spans all three rows
+])
+
+BOTTOM_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('ALIGN', (0, 0), (0, 0), 'CENTER'),
+    ('ALIGN', (1, 0), (-1, 0), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('LEFTPADDING', (0, 0), (-1, -1), 2),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 2),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+])
+
+# Characters stripped when normalizing column names
+_NON_ALNUM_RE = re.compile(r'[^a-zA-Z0-9]')
+
 def normalize_column_name(col_name):
     """Normalize column names by removing all non-alphanumeric characters and converting to lowercase"""
-    return re.sub(r'[^a-zA-Z0-9]', '', str(col_name)).lower()
+    return _NON_ALNUM_RE.sub('', str(col_name)).lower()
+
+def normalize_columns(columns):
+    """Map normalized column names back to the original column names"""
+    return {normalize_column_name(col): col for col in columns}
 
-def find_column(df, possible_names):
+def find_column(df, possible_names, normalized_df_columns=None):
     """Find a column in the DataFrame that matches any of the possible names"""
-    normalized_df_columns = {normalize_column_name(col): col for col in df.columns}
+    if normalized_df_columns is None:
+        normalized_df_columns = normalize_columns(df.columns)
     normalized_possible_names = [normalize_column_name(name) for name in possible_names]
+    return match_normalized_column(normalized_possible_names, normalized_df_columns)
 
+def match_normalized_column(normalized_possible_names, normalized_df_columns):
+    """Match already-normalized aliases against a normalized -> original column map"""
     for norm_name in normalized_possible_names:
         if norm_name in normalized_df_columns:
             return normalized_df_columns[norm_name]
@@ -51,8 +221,79 @@ def find_column(df, possible_names):
 
     return None
 
+# Column aliases, keyed by the field name used throughout sticker generation
+COLUMN_MAPPINGS = {
+    'ASSLY': ['assly', 'ASSY NAME', 'Assy Name', 'assy name', 'assyname',
+             'assy_name', 'Assy_name', 'Assembly', 'Assembly Name', 'ASSEMBLY', 'Assembly_Name'],
+    'part_no': ['PARTNO', 'PARTNO.', 'Part No', 'Part Number', 'PartNo',
+               'partnumber', 'part no', 'partnum', 'PART', 'part', 'Product Code',
+               'Item Number', 'Item ID', 'Item No', 'item', 'Item'],
+    'description': ['DESCRIPTION', 'Description', 'Desc', 'Part Description',
+                   'ItemDescription', 'item description', 'Product Description',
+                   'Item Description', 'NAME', 'Item Name', 'Product Name'],
+    'Part_per_veh': ['QYT', 'QTY / VEH', 'Qty/Veh', 'Qty Bin', 'Quantity per Bin',
+                    'qty bin', 'qtybin', 'quantity bin', 'BIN QTY', 'BINQTY',
+                    'QTY_BIN', 'QTY_PER_BIN', 'Bin Quantity', 'BIN'],
+    'Type': ['TYPE', 'type', 'Type', 'tyPe', 'Type name'],
+    'line_location': ['LINE LOCATION', 'Line Location', 'line location', 'LINELOCATION',
+                     'linelocation', 'Line_Location', 'line_location', 'LINE_LOCATION',
+                     'LineLocation', 'line_loc', 'lineloc', 'LINELOC', 'Line Loc'],
+    'part_status': ['PART STATUS', 'Part Status', 'part status', 'PARTSTATUS',
+                   'partstatus', 'Part_Status', 'part_status', 'PART_STATUS',
+                   'PartStatus', 'STATUS', 'Status', 'status', 'Item Status',
+                   'Component Status', 'Part State', 'State'],
+    'bin_type': ['BIN TYPE', 'Bin Type', 'bin type', 'BINTYPE', 'bintype',
+                'Bin_Type', 'bin_type', 'BIN_TYPE', 'BinType', 'Container Type',
+                'CONTAINER TYPE', 'Container_Type', 'container_type', 'CONTAINER_TYPE',
+                'ContainerType', 'CONTAINER', 'Container', 'container', 'BIN', 'Bin', 'bin',
+                'Package Type', 'PACKAGE TYPE', 'Package_Type', 'package_type', 'PACKAGE_TYPE',
+                'PackageType', 'Storage Type', 'STORAGE TYPE', 'Storage_Type', 'storage_type']
+}
+
+REQUIRED_COLUMNS = ('ASSLY', 'part_no', 'description')
+
+# Display names for the fields in COLUMN_MAPPINGS
+COLUMN_LABELS = {
+    'ASSLY': "ASSLY (Assembly Name)",
+    'part_no': "PART NO (Part Number)",
+    'description': "DESCRIPTION (Part Description)",
+    'Part_per_veh': "QTY/VEH (Quantity per Vehicle)",
+    'Type': "TYPE (Part Type)",
+    'line_location': "LINE LOCATION (Location Info)",
+    'part_status': "PART STATUS (Status)",
+    'bin_type': "BIN TYPE (Container Type)"
+}
+
+# Aliases normalized once at import, duplicates dropped but priority order kept
+NORMALIZED_COLUMN_MAPPINGS = {
+    key: tuple(dict.fromkeys(normalize_column_name(name) for name in possible_names))
+    for key, possible_names in COLUMN_MAPPINGS.items()
+}
+
+@lru_cache(maxsize=64)
+def _map_column_tuple(columns):
+    """Cached column detection, keyed by the header as a tuple"""
+    normalized_df_columns = normalize_columns(columns)
+    return {
+        key: found_col
+        for key, normalized_names in NORMALIZED_COLUMN_MAPPINGS.items()
+        if (found_col := match_normalized_column(normalized_names, normalized_df_columns))
+    }
+
+def map_columns(columns):
+    """Map each field in COLUMN_MAPPINGS to its matching column, skipping fields with no match
+
+    Detection only depends on the header, so reruns with the same columns hit the cache.
+    """
+    return dict(_map_column_tuple(tuple(columns)))
+
 def process_uploaded_logo(uploaded_logo, target_width_cm, target_height_cm):
-    """Process uploaded logo to fit the specified dimensions"""
+    """Process uploaded logo to fit the specified dimensions
+
+    Returns (ImageReader, width, height) with the drawn size in points, or None on failure.
+    """
+    from PIL import Image as PILImage
+
     try:
         # Load image from uploaded file
         logo_img = PILImage.open(uploaded_logo)
@@ -87,13 +328,9 @@ def process_uploaded_logo(uploaded_logo, target_width_cm, target_height_cm):
             new_height = box_height_px
             new_width = int(box_height_px * aspect_ratio)
 
-        # Resize with high quality
-        logo_img = logo_img.resize((new_width, new_height), PILImage.Resampling.LANCZOS)
-
-        # Convert to bytes for ReportLab
-        img_buffer = BytesIO()
-        logo_img.save(img_buffer, format='PNG', quality=100, optimize=False)
-        img_buffer.seek(0)
+        # Resize with high quality - reducing_gap box-reduces large logos first so
+        # LANCZOS only convolves over ~3x the target size
+        logo_img = logo_img.resize((new_width, new_height), PILImage.Resampling.LANCZOS, reducing_gap=3.0)
 
         # Convert back to cm for ReportLab
         final_width_cm = new_width * 2.54 / dpi
@@ -103,107 +340,130 @@ def process_uploaded_logo(uploaded_logo, target_width_cm, target_height_cm):
         print(f"LOGO DEBUG: Final: {final_width_cm:.2f}cm x {final_height_cm:.2f}cm")
         print(f"LOGO DEBUG: Pixels: {new_width}px x {new_height}px")
 
-        # Create ReportLab Image with actual dimensions
-        return Image(img_buffer, width=final_width_cm*cm, height=final_height_cm*cm)
+        # One ImageReader over the resized PIL image, shared by every sticker - ReportLab
+        # reads the pixels straight from it and embeds the logo once, no PNG round-trip
+        return ImageReader(logo_img), final_width_cm*cm, final_height_cm*cm
 
     except Exception as e:
         st.error(f"Error processing uploaded logo: {e}")
         return None
 
-def generate_qr_code(data_string):
+@lru_cache(maxsize=4096)
+def _qr_module_runs(data_string, mask=None):
+    """Encode the data string as a QR code and return (size in modules, dark runs), cached per payload and mask
+
+    mask=None lets segno score all eight mask patterns and keep the best one;
+    a fixed mask skips that search, which is most of the encoding time.
+
+    Runs are packed as a flat array of (row, first column, length) triples of
+    dark modules, counted from the top-left corner of the symbol including its
+    quiet zone. Packing keeps the long-lived cache entries small.
+    """
+    import segno
+
+    # Always a full QR symbol (never Micro QR), smallest version that fits
+    qr = segno.make_qr(data_string, error='m', mask=mask)
+
+    runs = array('H')
+    row_index = -1
+    for row_index, modules in enumerate(qr.matrix_iter(scale=1, border=2)):
+        start = None
+        for col_index, dark in enumerate(modules):
+            if dark and start is None:
+                start = col_index
+            elif not dark and start is not None:
+                runs.extend((row_index, start, col_index - start))
+                start = None
+        if start is not None:
+            runs.extend((row_index, start, len(modules) - start))
+    return row_index + 1, runs
+
+class QRCodeFlowable(Flowable):
+    """Draw a QR code as filled vector rectangles instead of an embedded raster image
+
+    The rectangles are written once per PDF as a form XObject named form_name;
+    every sticker with the same payload just references that form.
+    """
+
+    def __init__(self, module_count, runs, size, form_name):
+        Flowable.__init__(self)
+        self.module_count = module_count
+        self.runs = runs
+        self.width = self.height = size
+        self.form_name = form_name
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        module_count = self.module_count
+        if not self.canv.hasForm(self.form_name):
+            # Emit the rectangles straight into the form stream in whole-module
+            # units - building a path object formats every coordinate as a
+            # float, which dominated sticker rendering time
+            triples = iter(self.runs)
+            operators = [f"{start} {module_count - row_index - 1} {length} 1 re"
+                         for row_index, start, length in zip(triples, triples, triples)]
+            operators.append("f")
+            self.canv.beginForm(self.form_name, 0, 0, module_count, module_count)
+            self.canv.addLiteral("\n".join(operators))
+            self.canv.endForm()
+
+        module = self.width / module_count
+        self.canv.saveState()
+        self.canv.scale(module, module)
+        self.canv.doForm(self.form_name)
+        self.canv.restoreState()
+
+def generate_qr_code(data_string, mask=None):
     """Generate a QR code from the given data string"""
     try:
-        import qrcode
-        from PIL import Image as PILImage
-
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_M,
-            box_size=8,
-            border=2,
-        )
-
-        qr.add_data(data_string)
-        qr.make(fit=True)
-
-        qr_img = qr.make_image(fill_color="black", back_color="white")
-
-        img_buffer = BytesIO()
-        qr_img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
-
-        return Image(img_buffer, width=1.8*cm, height=1.8*cm)
+        module_count, runs = _qr_module_runs(data_string, mask)
+        # Content-addressed form name, so repeated payloads share one XObject
+        form_name = "QR" + hashlib.sha1(f"{mask}:{data_string}".encode("utf-8")).hexdigest()
+        return QRCodeFlowable(module_count, runs, 1.8*cm, form_name)
     except Exception as e:
         st.error(f"Error generating QR code: {e}")
         return None
 
 def parse_line_location(location_string):
     """Parse line location string and split into 4 boxes"""
-    if not location_string or pd.isna(location_string):
+    if not location_string:
         return ["", "", "", ""]
 
-    parts = str(location_string).split("_")
+    parts = location_string.split("_")
     result = parts[:4] + [""] * (4 - len(parts))
     return result[:4]
 
 def generate_sticker_labels(df, line_loc_header_width, line_loc_box1_width,
                           line_loc_box2_width, line_loc_box3_width, line_loc_box4_width,
-                          uploaded_first_box_logo=None):
-    """Generate sticker labels with QR code from DataFrame"""
-    try:
-        # Define column mappings - Including bin_type mapping
-        column_mappings = {
-            'ASSLY': ['assly', 'ASSY NAME', 'Assy Name', 'assy name', 'assyname',
-                     'assy_name', 'Assy_name', 'Assembly', 'Assembly Name', 'ASSEMBLY', 'Assembly_Name'],
-            'part_no': ['PARTNO', 'PARTNO.', 'Part No', 'Part Number', 'PartNo',
-                       'partnumber', 'part no', 'partnum', 'PART', 'part', 'Product Code',
-                       'Item Number', 'Item ID', 'Item No', 'item', 'Item'],
-            'description': ['DESCRIPTION', 'Description', 'Desc', 'Part Description',
-                           'ItemDescription', 'item description', 'Product Description',
-                           'Item Description', 'NAME', 'Item Name', 'Product Name'],
-            'Part_per_veh': ['QYT', 'QTY / VEH', 'Qty/Veh', 'Qty Bin', 'Quantity per Bin',
-                            'qty bin', 'qtybin', 'quantity bin', 'BIN QTY', 'BINQTY',
-                            'QTY_BIN', 'QTY_PER_BIN', 'Bin Quantity', 'BIN'],
-            'Type': ['TYPE', 'type', 'Type', 'tyPe', 'Type name'],
-            'line_location': ['LINE LOCATION', 'Line Location', 'line location', 'LINELOCATION',
-                             'linelocation', 'Line_Location', 'line_location', 'LINE_LOCATION',
-                             'LineLocation', 'line_loc', 'lineloc', 'LINELOC', 'Line Loc'],
-            'part_status': ['PART STATUS', 'Part Status', 'part status', 'PARTSTATUS',
-                           'partstatus', 'Part_Status', 'part_status', 'PART_STATUS',
-                           'PartStatus', 'STATUS', 'Status', 'status', 'Item Status',
-                           'Component Status', 'Part State', 'State'],
-            'bin_type': ['BIN TYPE', 'Bin Type', 'bin type', 'BINTYPE', 'bintype',
-                        'Bin_Type', 'bin_type', 'BIN_TYPE', 'BinType', 'Container Type',
-                        'CONTAINER TYPE', 'Container_Type', 'container_type', 'CONTAINER_TYPE',
-                        'ContainerType', 'CONTAINER', 'Container', 'container', 'BIN', 'Bin', 'bin',
-                        'Package Type', 'PACKAGE TYPE', 'Package_Type', 'package_type', 'PACKAGE_TYPE',
-                        'PackageType', 'Storage Type', 'STORAGE TYPE', 'Storage_Type', 'storage_type']
-        }
+                          uploaded_first_box_logo=None, fast_qr=True):
+    """Generate sticker labels with QR code from DataFrame
 
+    fast_qr encodes every QR code with a fixed mask pattern instead of
+    searching for the best one.
+    """
+    try:
         # Find columns
-        found_columns = {}
-        for key, possible_names in column_mappings.items():
-            found_col = find_column(df, possible_names)
-            if found_col:
-                found_columns[key] = found_col
+        found_columns = map_columns(df.columns)
 
         # Check required columns
-        required_columns = ['ASSLY', 'part_no', 'description']
-        missing_required = [col for col in required_columns if col not in found_columns]
+        missing_required = [col for col in REQUIRED_COLUMNS if col not in found_columns]
 
         if missing_required:
             st.error(f"Missing required columns: {missing_required}")
             return None, None
 
-        # Create a temporary file for PDF
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            output_pdf_path = tmp_file.name
+        # Build the PDF in memory, one canvas page per sticker
+        pdf_buffer = BytesIO()
+        pdf_canvas = Canvas(pdf_buffer, pagesize=STICKER_PAGESIZE)
+
+        # Content box position on the sticker
+        x_offset = (STICKER_WIDTH - CONTENT_BOX_WIDTH) / 2
+        y_offset = STICKER_HEIGHT - CONTENT_BOX_HEIGHT - 0.2*cm
 
-        # Create PDF with adjusted margins
-        def draw_border(canvas, doc):
+        def draw_border(canvas):
             canvas.saveState()
-            x_offset = (STICKER_WIDTH - CONTENT_BOX_WIDTH) / 2
-            y_offset = STICKER_HEIGHT - CONTENT_BOX_HEIGHT - 0.2*cm
             canvas.setStrokeColor(colors.black)
             canvas.setLineWidth(1.5)
             canvas.rect(
@@ -214,56 +474,28 @@ def generate_sticker_labels(df, line_loc_header_width, line_loc_box1_width,
             )
             canvas.restoreState()
 
-        doc = SimpleDocTemplate(output_pdf_path, pagesize=STICKER_PAGESIZE,
-                              topMargin=0.2*cm,
-                              bottomMargin=(STICKER_HEIGHT - CONTENT_BOX_HEIGHT - 0.2*cm),
-                              leftMargin=(STICKER_WIDTH - CONTENT_BOX_WIDTH) / 2,
-                              rightMargin=(STICKER_WIDTH - CONTENT_BOX_WIDTH) / 2)
-
-        # Define styles
-        header_style = ParagraphStyle(name='HEADER', fontName='Helvetica-Bold', fontSize=8, alignment=TA_CENTER, leading=9)
-        ASSLY_style = ParagraphStyle(
-            name='ASSLY',
-            fontName='Helvetica',
-            fontSize=9,
-            alignment=TA_LEFT,
-            leading=11,
-            spaceAfter=0,
-            wordWrap='CJK',
-            autoLeading="max"
-        )
-        Part_style = ParagraphStyle(
-            name='PART NO',
-            fontName='Helvetica-Bold',
-            fontSize=11,
-            alignment=TA_LEFT,
-            leading=13,
-            spaceAfter=0,
-            wordWrap='CJK',
-            autoLeading="max"
-        )
-        # Style for part status box
-        Part_status_style = ParagraphStyle(
-            name='PART STATUS',
-            fontName='Helvetica-Bold',
-            fontSize=9,
-            alignment=TA_CENTER,
-            leading=11,
-            spaceAfter=0,
-            wordWrap='CJK',
-            autoLeading="max"
-        )
-        desc_style = ParagraphStyle(name='PART DESC', fontName='Helvetica', fontSize=7, alignment=TA_LEFT, leading=8, spaceAfter=0, wordWrap='CJK', autoLeading="max")
-        partper_style = ParagraphStyle(name='Quantity', fontName='Helvetica', fontSize=9, alignment=TA_LEFT, leading=12)
-        # Style for bin type
-        bin_type_style = ParagraphStyle(name='BinType', fontName='Helvetica', fontSize=8, alignment=TA_CENTER, leading=10)
-        Type_style = ParagraphStyle(name='Quantity', fontName='Helvetica', fontSize=7, alignment=TA_LEFT, leading=12)
-        date_style = ParagraphStyle(name='DATE', fontName='Helvetica', fontSize=7, alignment=TA_LEFT, leading=12)
-        location_style = ParagraphStyle(name='Location', fontName='Helvetica', fontSize=8, alignment=TA_CENTER, leading=10)
+        def draw_sticker(canvas, tables):
+            """Draw one sticker page - tables stacked top-down from the content box top"""
+            draw_border(canvas)
+            # 0.2cm top margin plus the 6pt padding the previous platypus frame applied
+            y = STICKER_HEIGHT - 0.2*cm - 6
+            for table_index, table in enumerate(tables):
+                _, table_height = table.wrapOn(canvas, CONTENT_BOX_WIDTH, y)
+                y -= table_height
+                table.drawOn(canvas, x_offset, y)
+                if table_index == 0 and first_box_logo:
+                    # Logo centred in the first box of the ASSLY row
+                    logo_reader, logo_width, logo_height = first_box_logo
+                    canvas.drawImage(logo_reader,
+                                     x_offset + (col_widths_assly[0] - logo_width) / 2,
+                                     y + (table_height - logo_height) / 2,
+                                     width=logo_width, height=logo_height, mask='auto')
+            canvas.showPage()
 
         content_width = CONTENT_BOX_WIDTH
-        all_elements = []
-        today_date = datetime.datetime.now().strftime("%d-%m-%Y")
+        # One timestamp for the whole run - sticker dates and the file name agree
+        now = datetime.datetime.now()
+        today_date = now.strftime("%d-%m-%Y")
 
         # Handle uploaded logo for first box
         first_box_logo = None
@@ -283,118 +515,112 @@ def generate_sticker_labels(df, line_loc_header_width, line_loc_box1_width,
             else:
                 st.error("❌ Failed to process uploaded logo")
 
-        # Process each row
-        total_rows = len(df)
-        progress_bar = st.progress(0)
-
-        for index, row in df.iterrows():
-            progress_bar.progress((index + 1) / total_rows)
-
-            elements = []
-
+        # Row heights
+        ASSLY_row_height = 0.85*cm
+        part_row_height = 0.8*cm
+        desc_row_height = 0.5*cm
+        qty_row_height = 0.6*cm
+        type_row_height = 0.6*cm
+        date_row_height = 0.6*cm
+        location_row_height = 0.5*cm
+
+        # Column widths - MAINTAINING ORIGINAL STRUCTURE
+        col_widths_assly = [
+            content_width * 0.25,    # Logo box: 25%
+            content_width * 0.15,    # Header: 15%
+            content_width * 0.60     # Value: 60%
+        ]
+
+        # Column widths for 3-column PART NO row
+        col_widths_partno = [
+            content_width * 0.25,    # Header: 25%
+            content_width * 0.50,    # Part number: 50%
+            content_width * 0.25     # Part status: 25%
+        ]
+
+        col_widths_standard = [content_width * 0.25, content_width * 0.75]
+
+        # Column widths for combined QTY/TYPE/DATE table (4 columns)
+        col_widths_qty = [
+            content_width * 0.25,    # Header: 25%
+            content_width * 0.175,   # Value 1: 17.5%
+            content_width * 0.175,   # Value 2/Bin type: 17.5%
+            content_width * 0.40     # QR code: 40%
+        ]
+
+        col_widths_bottom = [
+            content_width * line_loc_header_width,
+            content_width * line_loc_box1_width,
+            content_width * line_loc_box2_width,
+            content_width * line_loc_box3_width,
+            content_width * line_loc_box4_width
+        ]
+
+        # Project the mapped columns under their keys and blank out NaNs in one vectorized pass
+        sub_df = df[list(found_columns.values())].set_axis(list(found_columns.keys()), axis=1)
+        sub_df = sub_df.astype(object).where(sub_df.notna(), "").astype(str)
+        # Fixed column order so each row unpacks positionally; unmapped optional columns stay blank
+        sub_df = sub_df.reindex(columns=list(COLUMN_MAPPINGS), fill_value="")
+        # Bold the last 3 ASSLY characters - sliced for all rows at once
+        sub_df['formatted_assly'] = (sub_df['ASSLY'].str[:-3] + "<font size='10'><b>"
+                                     + sub_df['ASSLY'].str[-3:] + "</b></font>")
+
+        # Build every QR payload at once - Including bin_type in QR data; blank optional fields are skipped
+        qr_data = ("ASSLY: " + sub_df['ASSLY'] + "\nPart No: " + sub_df['part_no']
+                   + "\nDescription: " + sub_df['description'] + "\n")
+        for label, key in [("QTY/VEH", 'Part_per_veh'), ("Bin Type", 'bin_type'), ("Type", 'Type'),
+                           ("Part Status", 'part_status'), ("Line Location", 'line_location')]:
+            qr_data += (label + ": " + sub_df[key] + "\n").where(sub_df[key] != "", "")
+        sub_df['qr_data'] = qr_data + f"Date: {today_date}"
+
+        # Fast QR pins the mask pattern instead of scoring all eight per code
+        qr_mask = FAST_QR_MASK if fast_qr else None
+
+        # Rows repeat assembly names, statuses, dates... - parse each (text, style) pair once.
+        # Scoped to this run: a Paragraph carries wrap/draw state, so sessions must not share one
+        paragraph = lru_cache(maxsize=PARAGRAPH_CACHE_SIZE)(Paragraph)
+
+        # Payload and cell of the previous sticker's QR code
+        last_qr_data = None
+        last_qr_cell = None
+
+        def build_row_elements(row):
+            """Build the tables for one sticker from a tuple of mapped column values"""
+            nonlocal last_qr_data, last_qr_cell
             # Extract data - Including bin_type extraction
-            ASSLY = str(row[found_columns.get('ASSLY', '')]) if 'ASSLY' in found_columns else "N/A"
-            part_no = str(row[found_columns.get('part_no', '')]) if 'part_no' in found_columns else "N/A"
-            desc = str(row[found_columns.get('description', '')]) if 'description' in found_columns else "N/A"
-            Part_per_veh = str(row[found_columns.get('Part_per_veh', '')]) if 'Part_per_veh' in found_columns and pd.notna(row[found_columns['Part_per_veh']]) else ""
-            Type = str(row[found_columns.get('Type', '')]) if 'Type' in found_columns and pd.notna(row[found_columns['Type']]) else ""
-            line_location_raw = str(row[found_columns.get('line_location', '')]) if 'line_location' in found_columns and pd.notna(row[found_columns['line_location']]) else ""
-            part_status = str(row[found_columns.get('part_status', '')]) if 'part_status' in found_columns and pd.notna(row[found_columns['part_status']]) else ""
-            bin_type = str(row[found_columns.get('bin_type', '')]) if 'bin_type' in found_columns and pd.notna(row[found_columns['bin_type']]) else ""
+            ASSLY, part_no, desc, Part_per_veh, Type, line_location_raw, part_status, bin_type, formatted_assly, qr_data = row
             location_boxes = parse_line_location(line_location_raw)
 
-            # Generate QR code - Including bin_type in QR data
-            qr_data = f"ASSLY: {ASSLY}\nPart No: {part_no}\nDescription: {desc}\n"
-            if Part_per_veh:
-                qr_data += f"QTY/VEH: {Part_per_veh}\n"
-            if bin_type:
-                qr_data += f"Bin Type: {bin_type}\n"
-            if Type:
-                qr_data += f"Type: {Type}\n"
-            if part_status:
-                qr_data += f"Part Status: {part_status}\n"
-            if line_location_raw:
-                qr_data += f"Line Location: {line_location_raw}\n"
-            qr_data += f"Date: {today_date}"
-
-            qr_image = generate_qr_code(qr_data)
-            if qr_image:
-                qr_cell = qr_image
-            else:
-                qr_cell = Paragraph("QR", ParagraphStyle(name='QRPlaceholder', fontName='Helvetica-Bold', fontSize=12, alignment=TA_CENTER))
-
-            # Row heights
-            ASSLY_row_height = 0.85*cm
-            part_row_height = 0.8*cm
-            desc_row_height = 0.5*cm
-            qty_row_height = 0.6*cm
-            type_row_height = 0.6*cm
-            date_row_height = 0.6*cm
-            location_row_height = 0.5*cm
+            # Generate QR code - runs of rows with the same payload reuse the previous cell
+            if qr_data != last_qr_data:
+                qr_image = generate_qr_code(qr_data, qr_mask)
+                if qr_image:
+                    last_qr_cell = qr_image
+                else:
+                    last_qr_cell = Paragraph("QR", QR_PLACEHOLDER_STYLE)
+                last_qr_data = qr_data
+            qr_cell = last_qr_cell
 
             # Process line location boxes
-            location_box_1 = Paragraph(location_boxes[0], location_style) if location_boxes[0] else ""
-            location_box_2 = Paragraph(location_boxes[1], location_style) if location_boxes[1] else ""
-            location_box_3 = Paragraph(location_boxes[2], location_style) if location_boxes[2] else ""
-            location_box_4 = Paragraph(location_boxes[3], location_style) if location_boxes[3] else ""
-
-            # Create ASSLY row content
-            first_box_content = first_box_logo if first_box_logo else ""
-
-            # Create all table rows
-            if len(ASSLY) > 3:
-                assly_main = ASSLY[:-3]
-                assly_suffix = ASSLY[-3:]
-            else:
-                assly_main = ""
-                assly_suffix = ASSLY
-            formatted_assly = f"{assly_main}<font size='10'><b>{assly_suffix}</b></font>"
-            
-            assly_row = [first_box_content, "ASSLY", Paragraph(formatted_assly, ASSLY_style)]
-            partno_row = ["PART NO", Paragraph(f"<b>{part_no}</b>", Part_style), Paragraph(f"<b>{part_status}</b>", Part_status_style)]
-            desc_row = ["PART DESC", Paragraph(desc, desc_style)]
+            location_box_1 = paragraph(location_boxes[0], LOCATION_STYLE) if location_boxes[0] else ""
+            location_box_2 = paragraph(location_boxes[1], LOCATION_STYLE) if location_boxes[1] else ""
+            location_box_3 = paragraph(location_boxes[2], LOCATION_STYLE) if location_boxes[2] else ""
+            location_box_4 = paragraph(location_boxes[3], LOCATION_STYLE) if location_boxes[3] else ""
+
+            # Create all table rows - the logo box is drawn straight onto the canvas
+            assly_row = ["", "ASSLY", paragraph(formatted_assly, ASSLY_STYLE)]
+            partno_row = ["PART NO", paragraph(f"<b>{part_no}</b>", PART_STYLE), paragraph(f"<b>{part_status}</b>", PART_STATUS_STYLE)]
+            desc_row = ["PART DESC", paragraph(desc, DESC_STYLE)]
             
             # Create combined table for QTY, TYPE, DATE with QR code
             qty_type_date_data = [
-                ["QTY/VEH", Paragraph(str(Part_per_veh), partper_style), Paragraph(bin_type, bin_type_style), qr_cell],
-                ["TYPE", Paragraph(str(Type), Type_style), "", ""],
-                ["DATE", Paragraph(today_date, date_style), "", ""]
+                ["QTY/VEH", paragraph(str(Part_per_veh), PARTPER_STYLE), paragraph(bin_type, BIN_TYPE_STYLE), qr_cell],
+                ["TYPE", paragraph(str(Type), TYPE_STYLE), "", ""],
+                ["DATE", paragraph(today_date, DATE_STYLE), "", ""]
             ]
             
             location_row = ["LINE LOCATION", location_box_1, location_box_2, location_box_3, location_box_4]
 
-            # Column widths - MAINTAINING ORIGINAL STRUCTURE
-            col_widths_assly = [
-                content_width * 0.25,    # Logo box: 25%
-                content_width * 0.15,    # Header: 15%
-                content_width * 0.60     # Value: 60%
-            ]
-
-            # Column widths for 3-column PART NO row
-            col_widths_partno = [
-                content_width * 0.25,    # Header: 25%
-                content_width * 0.50,    # Part number: 50%
-                content_width * 0.25     # Part status: 25%
-            ]
-            
-            col_widths_standard = [content_width * 0.25, content_width * 0.75]
-
-            # Column widths for combined QTY/TYPE/DATE table (4 columns)
-            col_widths_qty = [
-                content_width * 0.25,    # Header: 25%
-                content_width * 0.175,   # Value 1: 17.5%
-                content_width * 0.175,   # Value 2/Bin type: 17.5%
-                content_width * 0.40     # QR code: 40%
-            ]
-            
-            col_widths_bottom = [
-                content_width * line_loc_header_width,
-                content_width * line_loc_box1_width,
-                content_width * line_loc_box2_width,
-                content_width * line_loc_box3_width,
-                content_width * line_loc_box4_width
-            ]
-
             # Create tables
             assly_table = Table([assly_row], colWidths=col_widths_assly, rowHeights=[ASSLY_row_height])
             partno_table = Table([partno_row], colWidths=col_widths_partno, rowHeights=[part_row_height])
@@ -402,127 +628,33 @@ def generate_sticker_labels(df, line_loc_header_width, line_loc_box1_width,
             qty_table = Table(qty_type_date_data, colWidths=col_widths_qty, rowHeights=[qty_row_height, type_row_height, date_row_height])
             bottom_table = Table([location_row], colWidths=col_widths_bottom, rowHeights=[location_row_height])
 
-            # Apply table styles
-            assly_table_style = [
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTNAME', (1, 0), (1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('ALIGN', (0, 0), (0, 0), 'CENTER'),
-                ('ALIGN', (1, 0), (1, 0), 'CENTER'),
-                ('ALIGN', (2, 0), (2, 0), 'LEFT'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('LEFTPADDING', (0, 0), (-1, -1), 2),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-                ('TOPPADDING', (0, 0), (-1, -1), 2),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ]
-
-            # Style for 3-column PART NO table
-            partno_table_style = [
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),  # Header bold
-                ('FONTNAME', (1, 0), (1, 0), 'Helvetica-Bold'),  # Part number bold
-                ('FONTNAME', (2, 0), (2, 0), 'Helvetica-Bold'),  # Part status bold
-                ('FONTSIZE', (0, 0), (0, 0), 8),                # Header font size
-                ('FONTSIZE', (1, 0), (1, 0), 11),               # Part number font size
-                ('FONTSIZE', (2, 0), (2, 0), 9),                # Part status font size
-                ('ALIGN', (0, 0), (0, 0), 'CENTER'),            # Header centered
-                ('ALIGN', (1, 0), (1, 0), 'LEFT'),              # Part number left
-                ('ALIGN', (2, 0), (2, 0), 'CENTER'),            # Part status centered
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('LEFTPADDING', (0, 0), (-1, -1), 3),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-                ('TOPPADDING', (0, 0), (-1, -1), 2),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ]
+            # Apply styles to tables
+            assly_table.setStyle(ASSLY_TABLE_STYLE)
+            partno_table.setStyle(PARTNO_TABLE_STYLE)
+            desc_table.setStyle(DESC_TABLE_STYLE)
+            qty_table.setStyle(QTY_TABLE_STYLE)
+            bottom_table.setStyle(BOTTOM_TABLE_STYLE)
 
-            desc_table_style = [
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (0, -1), 8),
-                ('FONTSIZE', (1, 0), (-1, 0), 7),
-                ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-                ('ALIGN', (1, 0), (1, 0), 'LEFT'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('LEFTPADDING', (0, 0), (-1, -1), 3),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-                ('TOPPADDING', (0, 0), (-1, -1), 2),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ]
+            return [assly_table, partno_table, desc_table, qty_table, bottom_table]
 
-            # Style for combined QTY/TYPE/DATE table with proper QR spanning
-            qty_table_style = [
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),  # Headers bold
-                ('FONTSIZE', (0, 0), (0, -1), 8),                # Header font size
-                ('FONTSIZE', (1, 0), (2, 0), 9),                # QTY and bin type font size
-                ('FONTSIZE', (1, 1), (2, 2), 10),               # TYPE and DATE font size
-                ('ALIGN', (0, 0), (0, -1), 'CENTER'),           # Headers centered
-                ('ALIGN', (1, 0), (1, -1), 'LEFT'),             # Values left
-                ('ALIGN', (2, 0), (2, 0), 'CENTER'),            # Bin type centered
-                ('ALIGN', (3, 0), (3, 0), 'CENTER'),            # QR code centered
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('LEFTPADDING', (0, 0), (-1, -1), 3),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-                ('TOPPADDING', (0, 0), (-1, -1), 2),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-                ('SPAN', (3, 0), (3, 2)),  # QR code spans all three rows
-            ]
+        # Process each row
+        total_rows = len(sub_df)
+        progress_bar = st.progress(0)
+        # Throttle progress updates to ~100 per run - each one is a websocket message
+        update_every = max(1, total_rows // 100)
 
-            bottom_table_style = [
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('ALIGN', (0, 0), (0, 0), 'CENTER'),
-                ('ALIGN', (1, 0), (-1, 0), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('LEFTPADDING', (0, 0), (-1, -1), 2),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 2),
-                ('TOPPADDING', (0, 0), (-1, -1), 2),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-            ]
+        for index, row in enumerate(sub_df.itertuples(index=False, name=None)):
+            if index % update_every == 0 or index == total_rows - 1:
+                progress_bar.progress((index + 1) / total_rows)
 
-            # Apply styles to tables
-            assly_table.setStyle(assly_table_style)
-            partno_table.setStyle(partno_table_style)
-            desc_table.setStyle(desc_table_style)
-            qty_table.setStyle(qty_table_style)
-            bottom_table.setStyle(bottom_table_style)
-
-            # Add tables to elements
-            elements.extend([
-                assly_table,
-                partno_table,
-                desc_table,
-                qty_table,
-                bottom_table
-            ])
-
-            # Add page break after each sticker except the last one
-            if index < len(df) - 1:
-                elements.append(PageBreak())
-            
-            all_elements.extend(elements)
+            draw_sticker(pdf_canvas, build_row_elements(row))
 
         # Clear progress bar
         progress_bar.empty()
 
-        # Build PDF with border
-        doc.build(all_elements, onFirstPage=draw_border, onLaterPages=draw_border)
+        pdf_canvas.save()
 
-        # Read the generated PDF
-        with open(output_pdf_path, 'rb') as pdf_file:
-            pdf_data = pdf_file.read()
-
-        # Clean up temporary file
-        os.unlink(output_pdf_path)
-
-        return pdf_data, f"sticker_labels_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        return pdf_buffer.getvalue(), f"sticker_labels_{now.strftime('%Y%m%d_%H%M%S')}.pdf"
 
     except Exception as e:
         st.error(f"Error generating sticker labels: {str(e)}")
@@ -530,6 +662,109 @@ def generate_sticker_labels(df, line_loc_header_width, line_loc_box1_width,
         st.error(f"Traceback: {traceback.format_exc()}")
         return None, None
 
+# Leading bytes of the supported workbook containers
+XLSX_SIGNATURE = b'PK\x03\x04'                       # ZIP (Office Open XML)
+XLS_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'  # OLE2 compound document
+
+# Tried in order on CSV uploads - latin-1 maps every byte, so it always succeeds
+CSV_ENCODINGS = ('utf-8-sig', 'cp1252', 'latin-1')
+
+def detect_csv_encoding(file_bytes):
+    """Return the first of CSV_ENCODINGS that decodes the whole file"""
+    for encoding in CSV_ENCODINGS:
+        try:
+            file_bytes.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+
+def sniff_csv_delimiter(head, encoding):
+    """Guess the CSV delimiter from the first bytes of the file, defaulting to a comma"""
+    try:
+        return csv.Sniffer().sniff(head.decode(encoding, 'ignore'), delimiters=',;\t|').delimiter
+    except csv.Error:
+        return ','
+
+def used_column_positions(columns):
+    """Positions of the header columns sticker generation maps, or None to read every column
+
+    Everything is kept when a required column is unmatched, so the preview still
+    shows the user what the file actually contains.
+    """
+    columns = list(columns)
+    # Readers label blank and repeated header names differently - read those files whole
+    if '' in columns or len(set(columns)) != len(columns):
+        return None
+    # Headers that normalize alike (Bin Type / BIN_TYPE) share one mapping slot whose
+    # match order depends on the columns around them - dropping any could change the mapping
+    if len(normalize_columns(columns)) != len(columns):
+        return None
+
+    found_columns = map_columns(columns)
+    if any(col not in found_columns for col in REQUIRED_COLUMNS):
+        return None
+    used = set(found_columns.values())
+    return [position for position, col in enumerate(columns) if col in used]
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def read_uploaded_file(file_bytes, file_name):
+    """Read uploaded CSV/Excel bytes into a DataFrame, preferring the native pyarrow/calamine parsers
+
+    Cached on the file contents and name, so widget reruns don't re-parse the upload.
+    CSV columns come back Arrow-typed (compact strings, nullable ints) where pyarrow is available.
+    The file header is checked first, so a mislabelled file is rejected before the full parse.
+    CSV reads parse only the columns the sticker mapping uses (see used_column_positions);
+    the file's full header is kept in df.attrs['source_columns'].
+    """
+    import pandas as pd
+
+    head = file_bytes[:4096]
+
+    if file_name.endswith('.csv'):
+        # Settle the encoding up front so a non-UTF-8 export doesn't fail mid-parse
+        encoding = detect_csv_encoding(file_bytes)
+        sep = sniff_csv_delimiter(head, encoding)
+        # Raw header row, before any renaming of blank or repeated names
+        header = pd.read_csv(BytesIO(file_bytes), sep=sep, encoding=encoding, header=None, nrows=1,
+                             dtype=str, keep_default_na=False).iloc[0].tolist()
+        usecols = used_column_positions(header)
+        df = None
+        # pyarrow keeps repeated header names as-is and rejects blank ones - only the
+        # C parser renames those (X.1, Unnamed: n), so such files skip pyarrow
+        if '' not in header and len(set(header)) == len(header):
+            try:
+                # The pyarrow reader selects columns by name only
+                df = pd.read_csv(BytesIO(file_bytes), sep=sep, encoding=encoding,
+                                 usecols=None if usecols is None else [header[i] for i in usecols],
+                                 engine='pyarrow', dtype_backend='pyarrow')
+            except (ImportError, ValueError):
+                # No pyarrow, or a ParserError / ArrowInvalid (both ValueErrors) on rows
+                # pyarrow rejects - e.g. short rows, which the C parser pads with NaN
+                pass
+        if df is None:
+            # C parser in one pass - low_memory=False avoids chunked, mixed-type dtype inference
+            df = pd.read_csv(BytesIO(file_bytes), sep=sep, encoding=encoding, usecols=usecols,
+                             engine='c', low_memory=False)
+        # Full header of the file, for the column count and list shown in the app
+        df.attrs['source_columns'] = list(header) if usecols is not None else list(df.columns)
+        return df
+
+    # Exports often carry the other Excel extension - accept either container
+    # and let the reader pick the format from the content
+    if not head.startswith((XLSX_SIGNATURE, XLS_SIGNATURE)):
+        raise ValueError(f"{file_name} is not a valid Excel workbook")
+
+    # Workbooks are read whole - the Excel readers parse every cell of the sheet
+    # even with usecols, so a header pre-read would only add a second parse.
+    # No Arrow dtypes here: a column mixing numbers and text (e.g. part numbers
+    # 123 and P2) fails Arrow conversion, where the default backend keeps it as object.
+    try:
+        return pd.read_excel(BytesIO(file_bytes), engine='calamine')
+    except ImportError:
+        # python-calamine not installed - fall back to openpyxl/xlrd (the calamine
+        # engine itself needs pandas 2.2, see requirements.txt)
+        return pd.read_excel(BytesIO(file_bytes))
+
 def main():
     """Main Streamlit application"""
     st.set_page_config(page_title="Sticker Label Generator", layout="wide")
@@ -563,6 +798,13 @@ def main():
             type=['png', 'jpg', 'jpeg'],
             help="Upload a logo to appear in the first box of each sticker"
         )
+
+        # QR settings
+        fast_qr = st.checkbox(
+            "Fast QR (skip mask optimization)",
+            value=True,
+            help="Use a fixed QR mask pattern instead of picking the best of eight - much faster for large batches"
+        )
         
         # Line location width settings
         
@@ -583,111 +825,101 @@ def main():
         line_loc_box4_width = 0.20
     # Main content area
     if uploaded_file is not None:
+        # Read the uploaded file - only parse failures are reported as file errors
         try:
-            # Read the uploaded file
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
-            
-            st.success(f"✅ File uploaded successfully! Found {len(df)} rows and {len(df.columns)} columns.")
-            
-            # Display file preview
-            with st.expander("📋 Data Preview", expanded=True):
-                st.dataframe(df.head(10), use_container_width=True)
-            
-            # Column mapping section
-            st.subheader("🔗 Column Mapping")
+            df = read_uploaded_file(uploaded_file.getvalue(), uploaded_file.name)
+        except Exception as e:
+            st.error(f"❌ Error reading file: {str(e)}")
+            st.error("Please make sure your file is a valid Excel (.xlsx, .xls) or CSV file.")
+            return
+        
+        # CSV uploads are read down to the mapped columns - report the file's own header
+        source_columns = df.attrs.get('source_columns', list(df.columns))
+        st.success(f"✅ File uploaded successfully! Found {len(df)} rows and {len(source_columns)} columns.")
+        
+        # Display file preview
+        with st.expander("📋 Data Preview", expanded=True):
+            skipped = len(source_columns) - len(df.columns)
+            if skipped:
+                st.caption(f"Showing the {len(df.columns)} columns used for the labels - "
+                           f"{skipped} unused column(s) were skipped.")
+            st.dataframe(df.head(10), use_container_width=True)
+        
+        # Column mapping section - collapsed, one markdown element per list
+        found_columns = map_columns(df.columns)
+        missing_required = [COLUMN_LABELS[key] for key in REQUIRED_COLUMNS if key not in found_columns]
+        # Opened automatically when a required column is missing, so the user sees why
+        with st.expander("🔗 Column Mapping", expanded=bool(missing_required)):
             col1, col2 = st.columns(2)
-            
+
             with col1:
-                st.write("**Available Columns:**")
-                for i, col in enumerate(df.columns):
-                    st.write(f"{i+1}. {col}")
-            
+                st.markdown("**Available Columns:**\n\n"
+                            + "\n".join(f"{i+1}. {col}" for i, col in enumerate(source_columns)))
+
             with col2:
+                # One table for every expected field rather than a line each
                 st.write("**Expected Column Types:**")
-                expected_columns = [
-                    "ASSLY (Assembly Name)",
-                    "PART NO (Part Number)",
-                    "DESCRIPTION (Part Description)",
-                    "QTY/VEH (Quantity per Vehicle)",
-                    "TYPE (Part Type)",
-                    "LINE LOCATION (Location Info)",
-                    "PART STATUS (Status)",
-                    "BIN TYPE (Container Type)"
-                ]
-                for col in expected_columns:
-                    st.write(f"• {col}")
-            
-            # Generate labels button
-            st.subheader("🏷️ Generate Labels")
-            
-            if st.button("Generate Sticker Labels", type="primary", use_container_width=True):
-                with st.spinner("Generating sticker labels... Please wait."):
-                    pdf_data, filename = generate_sticker_labels(
-                        df, 
-                        line_loc_header_width,
-                        line_loc_box1_width,
-                        line_loc_box2_width,
-                        line_loc_box3_width,
-                        line_loc_box4_width,
-                        uploaded_logo
+                st.dataframe(
+                    [
+                        {
+                            "Field": label,
+                            "Detected as": str(found_columns[key]) if key in found_columns else "—",
+                            "Status": "✅" if key in found_columns else ("❌" if key in REQUIRED_COLUMNS else "ℹ️"),
+                        }
+                        for key, label in COLUMN_LABELS.items()
+                    ],
+                    hide_index=True,
+                    use_container_width=True
+                )
+        
+        # Generate labels button
+        st.subheader("🏷️ Generate Labels")
+
+        # No point rendering anything when required columns were not found
+        if missing_required:
+            st.error(f"❌ Missing required columns: {', '.join(missing_required)}")
+
+        if st.button("Generate Sticker Labels", type="primary", use_container_width=True,
+                     disabled=bool(missing_required)):
+            with st.spinner("Generating sticker labels... Please wait."):
+                pdf_data, filename = generate_sticker_labels(
+                    df, 
+                    line_loc_header_width,
+                    line_loc_box1_width,
+                    line_loc_box2_width,
+                    line_loc_box3_width,
+                    line_loc_box4_width,
+                    uploaded_logo,
+                    fast_qr
+                )
+                
+                if pdf_data:
+                    st.success("✅ Sticker labels generated successfully!")
+                    
+                    # Download button
+                    st.download_button(
+                        label="📥 Download PDF",
+                        data=pdf_data,
+                        file_name=filename,
+                        mime="application/pdf",
+                        use_container_width=True
                     )
                     
-                    if pdf_data:
-                        st.success("✅ Sticker labels generated successfully!")
-                        
-                        # Download button
-                        st.download_button(
-                            label="📥 Download PDF",
-                            data=pdf_data,
-                            file_name=filename,
-                            mime="application/pdf",
-                            use_container_width=True
-                        )
-                        
-                        # Display some statistics
-                        st.info(f"📊 Generated {len(df)} sticker labels")
-                        
-                    else:
-                        st.error("❌ Failed to generate sticker labels. Please check your data and try again.")
-        
-        except Exception as e:
-            st.error(f"❌ Error reading file: {str(e)}")
-            st.error("Please make sure your file is a valid Excel (.xlsx, .xls) or CSV file.")
-    
+                    # Display some statistics
+                    st.info(f"📊 Generated {len(df)} sticker labels")
+                    
+                else:
+                    st.error("❌ Failed to generate sticker labels. Please check your data and try again.")
+
     else:
         # Instructions when no file is uploaded
         st.info("👆 Please upload an Excel or CSV file to get started.")
         
         st.subheader("📋 File Format Requirements")
-        st.markdown("""
-        Your file should contain the following columns (column names are flexible):
-        
-        **Required Columns:**
-        - **Assembly Name** (ASSLY, Assembly, etc.)
-        - **Part Number** (PART NO, Part Number, etc.)
-        - **Description** (DESCRIPTION, Part Description, etc.)
-        
-        **Optional Columns:**
-        - **Quantity** (QTY/VEH, Quantity, etc.)
-        - **Type** (TYPE, Part Type, etc.)
-        - **Line Location** (LINE LOCATION, Line Location, etc.)
-        - **Part Status** (PART STATUS, Status, etc.)
-        - **Bin Type** (BIN TYPE, Container Type, etc.)
-        """)
+        st.markdown(FORMAT_REQUIREMENTS_MD)
         
         st.subheader("🔧 Features")
-        st.markdown("""
-        - 🏷️ **Professional sticker labels** with bordered layout
-        - 📱 **QR codes** containing all product information
-        - 🖼️ **Logo support** for branding
-        - 📐 **Customizable layout** with adjustable column widths
-        - 📋 **Flexible column mapping** - works with various column names
-        - 📄 **PDF output** ready for printing
-        - 🔄 **Batch processing** of multiple items
-        """)
+        st.markdown(FEATURES_MD)
 
 # Run the application
 if __name__ == "__main__":